@@ -0,0 +1,194 @@
+"""
+A load generator for the rating submission path: many concurrent students submitting slider vectors which are scored
+(membership, rules, defuzzify) and written to the database, all within one process, as the streamlit server would.
+Storage is the SQLite stand-in from src.library.database.
+
+    python -m benchmarks.loadtest --clients 32 --rate 100,200,400 --duration 10
+    python -m benchmarks.loadtest --replay ratings.parquet --rate 0 --requests 5000
+
+Arrivals are open-loop (Poisson at --rate submissions per second, so latency includes any time spent queueing for a
+free client) or, with --rate 0, closed-loop (every client submits again as soon as its last submission finishes).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.library.database import COLUMNS, connect_sqlite, insert_rating
+from src.library.rule_engine import fuzzify, infer, defuzzify, raw_attributes
+from src.library.tracing import percentiles
+
+STAGES = ["queue", "membership", "rules", "defuzzify", "db_write", "total"]
+
+
+def synthetic_ratings(count: int, seed=None):
+    """
+    Slider vectors drawn the way the rating form produces them: whole steps from 1 to 10, divided by 10.
+    """
+    generator = random.Random(seed)
+    ratings = []
+    for _ in range(count):
+        rating = {key: generator.randint(1, 10) / 10.0 for key in raw_attributes}
+        rating["tenure"] = generator.choice([0.1, 1.0])     # the tenure slider steps straight from 1 to 10
+        ratings.append(rating)
+    return ratings
+
+
+def recorded_ratings(path):
+    """
+    Slider vectors replayed from an export written by src.library.ratings_io.
+    """
+    import pandas as pd
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".parquet":
+        frame = pd.read_parquet(path, columns=list(COLUMNS.keys()))
+    elif extension == ".feather":
+        frame = pd.read_feather(path, columns=list(COLUMNS.keys()))
+    else:
+        frame = pd.read_csv(path, usecols=list(COLUMNS.keys()))
+    return frame.to_dict("records")
+
+
+class LoadTest:
+    def __init__(self, ratings, clients: int = 16, database=None):
+        """
+        :param ratings: the slider vectors to submit, cycled through in order
+        :param clients: the number of submissions processed concurrently
+        :param database: the SQLite file written to, a temporary file by default
+        """
+        self.ratings = ratings
+        self.clients = clients
+        if database is None:
+            handle, database = tempfile.mkstemp(suffix=".db")
+            os.close(handle)
+        self.database = database
+        connect_sqlite(self.database).execute("PRAGMA journal_mode=WAL").close()
+        self._local = threading.local()
+
+    def _connection(self):
+        # sqlite connections may not be shared between threads, so every client gets its own
+        if not hasattr(self._local, "connection"):
+            self._local.connection = connect_sqlite(self.database, timeout=30)
+        return self._local.connection
+
+    def _submit(self, rating, arrival):
+        timings = {}
+        start = time.perf_counter()
+        timings["queue"] = start - arrival
+
+        base_valuation = fuzzify(rating)
+        mark = time.perf_counter()
+        timings["membership"] = mark - start
+
+        valuation = infer(base_valuation)
+        timings["rules"] = time.perf_counter() - mark
+        mark = time.perf_counter()
+
+        defuzzify(valuation)
+        timings["defuzzify"] = time.perf_counter() - mark
+        mark = time.perf_counter()
+
+        insert_rating(self._connection(), "load", "test", rating)
+        end = time.perf_counter()
+        timings["db_write"] = end - mark
+        timings["total"] = end - arrival
+        return timings
+
+    def run(self, rate: float, requests: int = None, duration: float = None, seed=None):
+        """
+        Submits ratings until either the request count or the duration is reached.
+        :param rate: the mean number of submissions per second, or 0 for closed-loop submission
+        :return: a report of per-stage latency percentiles (in milliseconds) and throughput
+        """
+        if requests is None and duration is None:
+            raise Exception("A load test needs a request count or a duration")
+        generator = random.Random(seed)
+        futures = []
+        # closed loop: one slot per client, freed as each submission finishes, so at most clients are ever in flight
+        slots = threading.Semaphore(self.clients)
+        with ThreadPoolExecutor(max_workers=self.clients) as pool:
+            begin = time.perf_counter()
+            arrival = begin
+            i = 0
+            while (requests is None or i < requests) and (duration is None or arrival - begin < duration):
+                rating = self.ratings[i % len(self.ratings)]
+                if rate > 0:
+                    arrival += generator.expovariate(rate)
+                    delay = arrival - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    futures.append(pool.submit(self._submit, rating, arrival))
+                else:
+                    slots.acquire()
+                    arrival = time.perf_counter()
+                    future = pool.submit(self._submit, rating, arrival)
+                    future.add_done_callback(lambda _: slots.release())
+                    futures.append(future)
+                i += 1
+            results = [future.result() for future in futures]
+            elapsed = time.perf_counter() - begin
+
+        report = {"offered_rate": rate,
+                  "clients": self.clients,
+                  "requests": len(results),
+                  "seconds": elapsed,
+                  "throughput": len(results) / elapsed if elapsed else 0.0,
+                  "stages": {}}
+        for stage in STAGES:
+            samples = [result[stage] * 1000 for result in results]
+            report["stages"][stage] = {**percentiles(samples), "mean": sum(samples) / len(samples) if samples else 0.0}
+        return report
+
+
+def _print_report(report):
+    rate = "closed loop" if report["offered_rate"] == 0 else "{:g}/s offered".format(report["offered_rate"])
+    print("{} with {} clients: {} requests in {:.2f}s, {:.1f}/s achieved".format(
+        rate, report["clients"], report["requests"], report["seconds"], report["throughput"]))
+    print("  {:<12}{:>10}{:>10}{:>10}{:>10}   (ms)".format("stage", "mean", "p50", "p95", "p99"))
+    for stage, stats in report["stages"].items():
+        print("  {:<12}{:>10.3f}{:>10.3f}{:>10.3f}{:>10.3f}".format(
+            stage, stats["mean"], stats.get("p50", 0), stats.get("p95", 0), stats.get("p99", 0)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the rating submission path")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent submissions")
+    parser.add_argument("--rate", default="100", help="submissions per second, a comma separated list to step "
+                                                      "through several rates, or 0 for closed loop")
+    parser.add_argument("--duration", type=float, help="seconds to run each rate for")
+    parser.add_argument("--requests", type=int, help="submissions to make at each rate")
+    parser.add_argument("--replay", help="a ratings export (csv, parquet or feather) to replay instead of synthetic "
+                                         "ratings")
+    parser.add_argument("--database", help="the SQLite file to write to, a temporary file by default")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the reports to this JSON file")
+    args = parser.parse_args(argv)
+    if args.duration is None and args.requests is None:
+        args.duration = 10.0
+
+    ratings = recorded_ratings(args.replay) if args.replay else synthetic_ratings(10000, args.seed)
+    test = LoadTest(ratings, args.clients, args.database)
+    reports = []
+    for rate in [float(rate) for rate in args.rate.split(",")]:
+        report = test.run(rate, args.requests, args.duration, args.seed)
+        _print_report(report)
+        reports.append(report)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(reports, file, indent=2)
+    if args.database is None:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(test.database + suffix):
+                os.remove(test.database + suffix)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Benchmarks for the fuzzy inference path: set membership, t-norms/t-conorms, rule resolution, defuzzification, and
+end-to-end evaluation at batch sizes from 1 to 10^6, plus the peak memory of evaluation.
+
+    python -m benchmarks.run run [--output results.json] [--filter NAME] [--quick]
+    python -m benchmarks.run save [--baseline benchmarks/baseline.json]
+    python -m benchmarks.run compare [--baseline benchmarks/baseline.json] [--current results.json] [--threshold 0.1]
+
+Every timing records the median of several repeats along with their interquartile range. compare only flags a
+benchmark when its median grew by more than the threshold and, along with its fastest repeat, by more than the noise
+(the larger IQR of the two runs), and re-times flagged benchmarks before reporting them, so that a noisy machine does
+not fail unchanged code. It exits with status 1 when any benchmark is still slower (or uses more memory) than the
+baseline, so it can gate CI.
+"""
+import argparse
+import datetime
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+
+import src.library.demorgans_tripple as de
+from src.library.inference_systems import Mamdani
+from src.library.rule_engine import evaluate, evaluate_batch, defuzzify, generate_generic_attribute, resolve, \
+    raw_attributes, derived_attributes
+
+DEFAULT_BASELINE = "benchmarks/baseline.json"
+BATCH_SIZES = [1, 10, 100, 1000, 10000, 100000, 1000000]
+QUICK_BATCH_SIZES = [1, 10, 100, 1000, 10000]
+TRIPLES = [de.Godel, de.Goguen, de.Lukasiewicz, de.Drastic, de.Nilpotent, de.Hamacher]
+
+# a fixed, mid-range rating so that most rules fire partially rather than short of their sets
+_RATING = {key: 0.1 * (3 + i % 5) for i, key in enumerate(raw_attributes)}
+
+
+def _ratings(size, seed=0):
+    generator = np.random.default_rng(seed)
+    return {key: generator.integers(1, 11, size) / 10.0 for key in raw_attributes}
+
+
+def _time(func, repeat=7):
+    """
+    :return: the median, minimum and interquartile range of the seconds per call over the repeats
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    samples = np.array(timer.repeat(repeat=repeat, number=number)) / number
+    q1, median, q3 = np.percentile(samples, [25, 50, 75])
+    return {"seconds": float(median), "min": float(samples.min()), "iqr": float(q3 - q1), "repeats": repeat}
+
+
+def _peak_memory(func):
+    """
+    :return: the peak number of bytes allocated through python while func runs
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmarks(quick=False, selected=None):
+    """
+    Yields (name, kind, func) for every benchmark, where kind is "time" or "memory".
+    :param selected: a predicate on benchmark names; the (up to 10^6 row) inputs of the batch benchmarks are only built
+    for names it accepts, so filtered runs do not allocate them
+    """
+    if selected is None:
+        selected = lambda name: True
+
+    fuzzy_set = generate_generic_attribute(name="bench").sets["medium"]
+    for x in (0.1, 0.3, 0.5):
+        yield "membership/trap/x={}".format(x), "time", lambda x=x: fuzzy_set.membership(x)
+    samples = np.linspace(0, 1, 1000)
+    yield "membership_array/trap/n=1000", "time", lambda: fuzzy_set.membership_array(samples)
+
+    for triple in TRIPLES:
+        yield "triple/{}/t".format(triple.__name__), "time", lambda triple=triple: triple.t(0.3, 0.6)
+        yield "triple/{}/s".format(triple.__name__), "time", lambda triple=triple: triple.s(0.3, 0.6)
+
+    base_valuation = {key: generate_generic_attribute(name=key, member_sets=spread).get_membership(_RATING[key])
+                      for key, spread in raw_attributes.items()}
+    for key, (_, rules) in derived_attributes.items():
+        yield "resolve/" + key, "time", lambda rules=rules: [resolve(rule, base_valuation) for rule in rules]
+
+    mamdani = Mamdani()
+    valuation = evaluate(_RATING)
+    for key, (spread, _) in derived_attributes.items():
+        attribute = generate_generic_attribute(name=key, member_sets=spread)
+        yield "mamdani/" + key, "time", lambda attribute=attribute, key=key: mamdani.resolve(attribute, valuation[key])
+
+    yield "evaluate/single", "time", lambda: evaluate(_RATING)
+    yield "evaluate+defuzzify/single", "time", lambda: defuzzify(evaluate(_RATING))
+
+    for size in QUICK_BATCH_SIZES if quick else BATCH_SIZES:
+        name = "evaluate_batch/n={}".format(size)
+        if selected(name):
+            yield name, "time", lambda columns=_ratings(size): evaluate_batch(columns)
+
+    memory_size = 10000 if quick else 100000
+    yield "memory/evaluate/single", "memory", lambda: evaluate(_RATING)
+    name = "memory/evaluate_batch/n={}".format(memory_size)
+    if selected(name):
+        yield name, "memory", lambda columns=_ratings(memory_size): evaluate_batch(columns)
+
+
+def run(name_filter=None, quick=False, verbose=True, names=None):
+    """
+    Runs every benchmark whose name contains name_filter (and, when given, is one of names).
+    :return: the results document, as saved to disk
+    """
+    def selected(name):
+        return (not name_filter or name_filter in name) and (names is None or name in names)
+
+    results = {}
+    for name, kind, func in benchmarks(quick, selected):
+        if not selected(name):
+            continue
+        if kind == "time":
+            # large batches take long enough that a few repeats are plenty
+            results[name] = _time(func, repeat=5 if "n=100000" in name else 7)
+        else:
+            results[name] = {"bytes": _peak_memory(func)}
+        if verbose:
+            print("{:<45} {}".format(name, _format(results[name])))
+    return {"meta": {"timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                     "python": platform.python_version(),
+                     "numpy": np.__version__,
+                     "machine": platform.platform()},
+            "results": results}
+
+
+def compare(baseline, current, threshold: float = 0.1):
+    """
+    Lists the benchmarks that regressed between two result documents. A timing only regresses when its median grew by
+    more than the threshold, and both its median and its fastest repeat moved past the baseline median by more than the
+    larger interquartile range of the two runs.
+    :param threshold: the fraction by which a benchmark may grow before it is flagged
+    :return: a list of (name, baseline value, current value, ratio) for every regression
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        metric = "seconds" if "seconds" in result else "bytes"
+        old, new = baseline["results"][name][metric], result[metric]
+        noise = max(baseline["results"][name].get("iqr", 0.0), result.get("iqr", 0.0))
+        ratio = new / old if old else float("inf") if new else 1.0
+        # even the fastest current repeat has to be slower, which keeps run-to-run jitter on a busy machine out
+        fastest = result.get("min", new)
+        if ratio > 1 + threshold and new - old > noise and fastest - old > noise:
+            regressions.append((name, old, new, ratio))
+    return regressions
+
+
+def _format(result):
+    if "bytes" in result:
+        return "{:,.0f} B peak".format(result["bytes"])
+    seconds = result["seconds"]
+    for unit, scale in (("s", 1), ("ms", 1e3), ("us", 1e6)):
+        if seconds * scale >= 1:
+            return "{:.3f} {}".format(seconds * scale, unit)
+    return "{:.1f} ns".format(seconds * 1e9)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the professor rating system")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks and print the results")
+    run_parser.add_argument("--output", help="also write the results to this file")
+    save_parser = commands.add_parser("save", help="run the benchmarks and store them as the baseline")
+    save_parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    compare_parser = commands.add_parser("compare", help="flag benchmarks that are slower than the baseline")
+    compare_parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    compare_parser.add_argument("--current", help="a saved results file, instead of running the benchmarks now")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown, 0.1 being 10%%")
+    for sub in (run_parser, save_parser, compare_parser):
+        sub.add_argument("--filter", help="only run benchmarks whose name contains this")
+        sub.add_argument("--quick", action="store_true", help="cap batch sizes at 10^4")
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        # checked before running anything, since no baseline is committed and a first compare would otherwise fail
+        # only after the whole suite has run
+        try:
+            with open(args.baseline) as file:
+                baseline = json.load(file)
+        except FileNotFoundError:
+            print("no baseline at {}; record one first with: python -m benchmarks.run save --baseline {}".format(
+                args.baseline, args.baseline), file=sys.stderr)
+            return 2
+
+    if args.command == "compare" and args.current:
+        with open(args.current) as file:
+            current = json.load(file)
+    else:
+        current = run(args.filter, args.quick)
+
+    if args.command == "run" and args.output:
+        with open(args.output, "w") as file:
+            json.dump(current, file, indent=2)
+    elif args.command == "save":
+        with open(args.baseline, "w") as file:
+            json.dump(current, file, indent=2)
+        print("baseline written to " + args.baseline)
+    elif args.command == "compare":
+        regressions = compare(baseline, current, args.threshold)
+        # re-time anything flagged on a live run, and keep the better of the two, to rule out a one-off hiccup
+        if regressions and not args.current:
+            print("re-timing {} flagged benchmark(s)".format(len(regressions)))
+            retimed = run(quick=args.quick, verbose=False, names=[name for name, _, _, _ in regressions])
+            for name, result in retimed["results"].items():
+                metric = "seconds" if "seconds" in result else "bytes"
+                if result[metric] < current["results"][name][metric]:
+                    current["results"][name] = result
+            regressions = compare(baseline, current, args.threshold)
+        for name, old, new, ratio in regressions:
+            metric = "bytes" if name.startswith("memory/") else "seconds"
+            print("REGRESSION {:<45} {} -> {} ({:+.0%})".format(name, _format({metric: old}), _format({metric: new}),
+                                                                 ratio - 1))
+        if regressions:
+            return 1
+        print("no regressions beyond {:.0%}".format(args.threshold))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
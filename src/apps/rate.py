@@ -7,6 +7,7 @@ they will then be taken back to the rating page.
 """
 import streamlit as st
 
+from src.library.charts import breakdown_chart, input_chart
 from src.library.rule_engine import evaluate
 
 def app():
@@ -21,6 +22,10 @@ def _results():
     with st.form("Output"):
         valuation = evaluate(st.session_state["input_values"])
 
+        st.image(breakdown_chart(st.session_state["input_values"]), use_column_width=True)
+        st.subheader("Your ratings")
+        st.image(input_chart(st.session_state["input_values"]), use_column_width=True)
+
         for name, attribute in valuation.items():
             st.subheader(name)
             for level, value in attribute.items():
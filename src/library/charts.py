@@ -0,0 +1,117 @@
+"""
+Charts for the results page. The membership curve of every fuzzy set is sampled once at import time, so drawing a chart
+only has to overlay the user's inputs; the rendered PNGs are then cached on the (quantized) inputs and triple, so that
+streamlit reruns of the same rating never redraw anything.
+"""
+from functools import lru_cache
+from io import BytesIO
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from src.library.demorgans_tripple import Triple, Godel
+from src.library.rule_engine import evaluate, defuzzify, generate_generic_attribute, raw_attributes, derived_attributes
+
+# inputs are quantized to this many decimal places before caching; the rating form moves in steps of 0.1
+QUANTIZATION = 2
+CACHE_SIZE = 128
+
+# samples per unit of x; the derived spreads reach past [0, 1], so every attribute is sampled over its own range
+_RESOLUTION = 200
+_COLUMNS = 3
+
+
+def _sample_curves(attributes):
+    """
+    :return: a dict mapping each attribute to (samples, {set name: memberships}), sampled over [0, 1] and the x range
+    of every one of its sets, so that neither the sets nor a crisp value (which lies within them) is cut off
+    """
+    curves = {}
+    for key, member_sets in attributes.items():
+        attribute = generate_generic_attribute(name=key, member_sets=member_sets)
+        low = min([0.0] + [fuz.x[0] for fuz in attribute.sets.values()])
+        high = max([1.0] + [fuz.x[-1] for fuz in attribute.sets.values()])
+        samples = np.linspace(low, high, int(round((high - low) * _RESOLUTION)) + 1)
+        curves[key] = samples, {name: fuz.membership_array(samples) for name, fuz in attribute.sets.items()}
+    return curves
+
+
+_RAW_CURVES = _sample_curves(raw_attributes)
+_DERIVED_CURVES = _sample_curves({key: value[0] for key, value in derived_attributes.items()})
+
+
+def _quantize(variable_dict):
+    return tuple(sorted((key, round(float(value), QUANTIZATION)) for key, value in variable_dict.items()))
+
+
+def _grid(count):
+    rows = -(-count // _COLUMNS)
+    figure = Figure(figsize=(4 * _COLUMNS, 2.2 * rows), tight_layout=True)
+    return figure, figure.subplots(rows, _COLUMNS, squeeze=False).flatten()
+
+
+def _to_png(figure):
+    buffer = BytesIO()
+    figure.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def input_chart(variable_dict):
+    """
+    Draws the membership curves of every rated attribute, marking where the user's rating falls on each.
+    :param variable_dict: the raw slider values, as passed to evaluate
+    :return: PNG bytes
+    """
+    return _render_inputs(_quantize(variable_dict))
+
+
+def breakdown_chart(variable_dict, triple: Triple = Godel):
+    """
+    Draws the membership curves of every derived attribute, shading each level up to its firing strength and marking
+    the defuzzified value.
+    :param variable_dict: the raw slider values, as passed to evaluate
+    :param triple: the De Morgan triple used to evaluate the rating
+    :return: PNG bytes
+    """
+    return _render_breakdown(_quantize(variable_dict), triple)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _render_inputs(quantized):
+    figure, axes = _grid(len(quantized))
+    for ax, (key, value) in zip(axes, quantized):
+        samples, curves = _RAW_CURVES[key]
+        for name, curve in curves.items():
+            ax.plot(samples, curve, label=name)
+        ax.axvline(value, color="black", linestyle="--")
+        ax.set_title(key.replace("_", " "))
+        ax.set_xlim(samples[0], samples[-1])
+        ax.set_ylim(0, 1.05)
+    for ax in axes[len(quantized):]:
+        ax.axis("off")
+    axes[0].legend(fontsize="x-small")
+    return _to_png(figure)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _render_breakdown(quantized, triple):
+    valuation = evaluate(dict(quantized), triple)
+    crisp = defuzzify(valuation)
+
+    figure, axes = _grid(len(valuation))
+    for ax, (key, memberships) in zip(axes, valuation.items()):
+        samples, curves = _DERIVED_CURVES[key]
+        for name, curve in curves.items():
+            line, = ax.plot(samples, curve, label=name)
+            ax.fill_between(samples, np.minimum(curve, memberships.get(name, 0.0)), color=line.get_color(), alpha=0.3)
+        if crisp[key] is None:
+            ax.set_title("{} (no rule fired)".format(key.replace("_", " ")))
+        else:
+            ax.axvline(crisp[key], color="black", linestyle="--")
+            ax.set_title("{} ({:.2f})".format(key.replace("_", " "), crisp[key]))
+        ax.set_xlim(samples[0], samples[-1])
+        ax.set_ylim(0, 1.05)
+        ax.legend(fontsize="x-small")
+    for ax in axes[len(valuation):]:
+        ax.axis("off")
+    return _to_png(figure)
@@ -0,0 +1,82 @@
+"""
+Storage for submitted ratings. The deployed app uses the MySQL schema described in the README; SQLite stands in for it
+locally, since it ships with python and speaks the same DB-API.
+"""
+import sqlite3
+
+# maps the keys used by the rating form (and evaluate) onto the columns of the professors table
+COLUMNS = {"email_speed":               "email_reply",
+           "public_speaking":           "public_speaking",
+           "native_speaker":            "fluency",
+           "explanation_quality":       "concept_conveyence",
+           "one_on_one":                "one_on_one",
+           "availability":              "availability",
+           "class_management":          "classroom_management",
+           "empathy":                   "empathy",
+           "workload":                  "workload",
+           "preparation":               "preparedness",
+           "assignment_value":          "assignment_weighting",
+           "assignment_quality":        "assessment_quality",
+           "webplatform_quality":       "webplatform_quality",
+           "real_world_applicability":  "workplace_applicability",
+           "available_resources":       "available_resources",
+           "knowledge":                 "domain_knowledge",
+           "career_length":             "experience_length",
+           "tenure":                    "tenured",
+           "rate_my_prof_score":        "rate_my_prof_score",
+           "publication":               "frequently_published",
+           "repeat_instruction":        "course_iterations"}
+
+NAME_COLUMNS = ["firstname", "lastname"]
+
+_SQLITE_SCHEMA = "CREATE TABLE IF NOT EXISTS professors (ID INTEGER PRIMARY KEY AUTOINCREMENT, {})".format(
+    ", ".join([name + " varchar(20)" for name in NAME_COLUMNS] + [column + " float" for column in COLUMNS.values()]))
+
+
+def connect_sqlite(path=":memory:", **kwargs):
+    """
+    Opens (and if needed creates) a SQLite database laid out like the production professors table.
+    :param path: the database file, defaults to a throwaway in-memory database
+    :return: a sqlite3 connection
+    """
+    connection = sqlite3.connect(path, **kwargs)
+    connection.execute(_SQLITE_SCHEMA)
+    connection.commit()
+    return connection
+
+
+def insert_ratings(connection, rows, batch_size: int = 10000, placeholder: str = "?"):
+    """
+    Writes ratings to the professors table in batches, committing once at the end.
+    :param connection: an open DB-API connection
+    :param rows: an iterable of (firstname, lastname, *values) tuples, with values ordered as in COLUMNS
+    :param batch_size: the number of rows handed to each executemany call
+    :param placeholder: the parameter marker of the driver, "?" for sqlite3 and "%s" for the MySQL connectors
+    :return: the number of rows written
+    """
+    columns = NAME_COLUMNS + list(COLUMNS.values())
+    query = "INSERT INTO professors ({}) VALUES ({})".format(", ".join(columns), ", ".join([placeholder] * len(columns)))
+
+    cursor = connection.cursor()
+    written = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            cursor.executemany(query, batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(query, batch)
+        written += len(batch)
+    connection.commit()
+    return written
+
+
+def insert_rating(connection, firstname, lastname, variable_dict, placeholder: str = "?"):
+    """
+    Writes a single rating, as submitted by the rating form.
+    :param variable_dict: the raw slider values, keyed as in COLUMNS
+    """
+    row = (firstname, lastname, *[variable_dict[key] for key in COLUMNS])
+    return insert_ratings(connection, [row], placeholder=placeholder)
@@ -1,5 +1,7 @@
 from abc import ABC
 
+import numpy as np
+
 
 # abstract base classes for fuzzy operations
 class Triple(ABC):
@@ -95,3 +97,55 @@ class Hamacher(Triple):
     @staticmethod
     def s(a, b):
         return (a+b)/(1+a*b)
+
+
+# array implementations, these take numpy arrays of memberships so that a whole batch can be resolved at once
+class ArrayGodel(Godel):
+    t = staticmethod(np.minimum)
+    s = staticmethod(np.maximum)
+
+
+class ArrayLukasiewicz(Lukasiewicz):
+    @staticmethod
+    def t(a, b):
+        return np.maximum(0, a+b-1)
+
+    @staticmethod
+    def s(a, b):
+        return np.minimum(a+b, 1)
+
+
+class ArrayDrastic(Drastic):
+    @staticmethod
+    def t(a, b):
+        return np.where(a == 1, b, np.where(b == 1, a, 0.0))
+
+    @staticmethod
+    def s(a, b):
+        return np.where(a == 0, b, np.where(b == 0, a, 1.0))
+
+
+class ArrayNilpotent(Nilpotent):
+    @staticmethod
+    def t(a, b):
+        return np.where(a+b > 1, np.minimum(a, b), 0.0)
+
+    @staticmethod
+    def s(a, b):
+        return np.where(a+b < 1, np.maximum(a, b), 1.0)
+
+
+class ArrayHamacher(Hamacher):
+    @staticmethod
+    def t(a, b):
+        denominator = a+b-a*b
+        return np.where(denominator == 0, 0.0, a*b/np.where(denominator == 0, 1, denominator))
+
+
+# Goguen is already expressed purely in arithmetic, so it can be used on arrays as is
+ARRAY_TRIPLES = {Godel: ArrayGodel,
+                 Goguen: Goguen,
+                 Lukasiewicz: ArrayLukasiewicz,
+                 Drastic: ArrayDrastic,
+                 Nilpotent: ArrayNilpotent,
+                 Hamacher: ArrayHamacher}
@@ -1,6 +1,8 @@
 from abc import ABC
 from enum import Enum
 
+import numpy as np
+
 # subclass of enums
 class MamdaniResolutions(Enum):
     SKYLINE = 1
@@ -11,6 +13,9 @@ class InferenceType(ABC):
     def resolve(self, attribute, memberships):
         return NotImplemented
 
+    def resolve_array(self, attribute, memberships):
+        return NotImplemented
+
 
 class Mamdani(InferenceType):
     def __init__(self, resolution_type: MamdaniResolutions = MamdaniResolutions.CENTER_OF_GRAVITY):
@@ -24,6 +29,14 @@ class Mamdani(InferenceType):
     def resolve(self, attribute, memberships):
         return self._resolution(attribute, memberships)
 
+    def resolve_array(self, attribute, memberships):
+        """
+        Resolves a whole batch at once; memberships maps each set name to a numpy array of heights.
+        """
+        if self._resolution != self._center_of_gravity:
+            return NotImplemented
+        return self._center_of_gravity_array(attribute, memberships)
+
     def _skyline(self,attribute, memberships):
         return NotImplemented
 
@@ -34,8 +47,24 @@ class Mamdani(InferenceType):
             # calculate Center of gravity for each component, and weight (area)
             total_membership.append(value.cog_and_area(membership))
 
-        return self._weighted_avg(total_membership)[0]
+        cog, weight = self._weighted_avg(total_membership)
+        # when no rule fired there is no area to take the centre of, so there is no crisp value
+        return None if weight == 0 else cog
 
+    def _center_of_gravity_array(self, attribute, memberships):
+        # a set's center of gravity does not move as it is clipped, only its area scales with the height,
+        # so the unit height cogs and areas can be reused for the whole batch
+        weighted_sum = 0.0
+        total_weight = 0.0
+        for key, value in attribute.sets.items():
+            if key not in memberships:
+                continue
+            cog, area = value.cog_and_area(1.0)
+            weight = area * np.asarray(memberships[key], dtype=float)
+            weighted_sum = weighted_sum + cog * weight
+            total_weight = total_weight + weight
+        total_weight = np.asarray(total_weight, dtype=float)
+        return np.where(total_weight == 0, np.nan, weighted_sum / np.where(total_weight == 0, 1, total_weight))
 
     def _weighted_avg(self, *args):
         total_weight = 0.0
@@ -0,0 +1,144 @@
+"""
+Department-wide rankings of professors. Every rating that comes in is defuzzified and folded into a running average for
+its professor, and one sorted index is kept per attribute so that top-k and percentile queries never need to re-sort.
+"""
+import math
+from bisect import bisect_left, bisect_right, insort
+
+from src.library.demorgans_tripple import Triple, Godel
+from src.library.rule_engine import evaluate, defuzzify, derived_attributes
+
+
+class RankIndex:
+    def __init__(self, name: str = ""):
+        """
+        A sorted index of (score, professor) pairs for a single attribute.
+        :param name: the attribute this index ranks.
+        """
+        self.name = name
+        self._entries = []
+        self._scores = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, professor):
+        return professor in self._scores
+
+    def update(self, professor, score: float):
+        """
+        Inserts a professor into the index, or moves them if they are already ranked.
+        :param professor: a hashable, mutually comparable professor identifier
+        :param score: the professor's new score for this attribute
+        """
+        if professor in self._scores:
+            self.remove(professor)
+        self._scores[professor] = score
+        insort(self._entries, (score, professor))
+
+    def remove(self, professor):
+        """
+        Drops a professor from the index.
+        :param professor: the professor to drop
+        """
+        entry = (self._scores.pop(professor), professor)
+        del self._entries[bisect_left(self._entries, entry)]
+
+    def score(self, professor):
+        return self._scores[professor]
+
+    def top(self, k: int, lowest: bool = False):
+        """
+        The k best ranked professors.
+        :param k: the number of professors to return
+        :param lowest: rank the smallest scores first instead of the largest (i.e. the least tyrannical professors)
+        :return: a list of (professor, score) pairs, best first
+        """
+        if lowest:
+            entries = self._entries[:k]
+        else:
+            entries = reversed(self._entries[max(len(self._entries) - k, 0):])
+        return [(professor, score) for score, professor in entries]
+
+    def percentile(self, professor, lowest: bool = False):
+        """
+        The percentage of the other ranked professors that this professor scores strictly better than.
+        :param professor: a professor already in the index
+        :param lowest: treat smaller scores as better
+        :return: a percentile between 0 and 100, 0 for a professor ranked alone since there is nobody to beat
+        """
+        score = self._scores[professor]
+        if len(self._entries) < 2:
+            return 0.0
+        if lowest:
+            beaten = len(self._entries) - bisect_right(self._entries, (score, _Greatest))
+        else:
+            beaten = bisect_left(self._entries, (score, _Least))
+        return 100.0 * beaten / (len(self._entries) - 1)
+
+
+class DepartmentRanking:
+    def __init__(self, attributes=None, triple: Triple = Godel):
+        """
+        Tracks the average defuzzified score of every professor in a department and ranks them on each attribute.
+        :param attributes: the attributes to rank on, defaults to every derived attribute
+        :param triple: the De Morgan triple used when evaluating incoming ratings
+        """
+        if attributes is None:
+            attributes = list(derived_attributes.keys())
+        self.triple = triple
+        self.indexes = {attribute: RankIndex(attribute) for attribute in attributes}
+        self._totals = {}
+        self._counts = {}
+
+    def add_rating(self, professor, variable_dict):
+        """
+        Scores a single student rating and folds it into the professor's rankings.
+        :param professor: the professor being rated
+        :param variable_dict: the raw slider values, in the same form passed to evaluate
+        :return: the crisp scores of this rating
+        """
+        scores = defuzzify(evaluate(variable_dict, self.triple))
+        self.add_scores(professor, scores)
+        return scores
+
+    def add_scores(self, professor, scores):
+        """
+        Folds already defuzzified scores into the professor's running averages, and repositions them in each index.
+        :param professor: the professor being rated
+        :param scores: a dict mapping attributes to crisp values; attributes that are not ranked, or that have no crisp
+        value because none of their rules fired, are ignored
+        """
+        totals = self._totals.setdefault(professor, {})
+        self._counts[professor] = self._counts.get(professor, 0) + 1
+        for attribute, index in self.indexes.items():
+            if scores.get(attribute) is None or math.isnan(scores[attribute]):
+                continue
+            total, count = totals.get(attribute, (0.0, 0))
+            totals[attribute] = (total + scores[attribute], count + 1)
+            index.update(professor, totals[attribute][0] / totals[attribute][1])
+
+    def top(self, attribute, k: int = 10, lowest: bool = False):
+        return self.indexes[attribute].top(k, lowest)
+
+    def percentile(self, attribute, professor, lowest: bool = False):
+        return self.indexes[attribute].percentile(professor, lowest)
+
+    def ratings(self, professor):
+        return self._counts.get(professor, 0)
+
+
+# sentinels that sort below/above every professor identifier, used to bound bisections on a score alone
+class _Bound:
+    def __init__(self, sign):
+        self._sign = sign
+
+    def __lt__(self, other):
+        return self._sign < 0
+
+    def __gt__(self, other):
+        return self._sign > 0
+
+
+_Least = _Bound(-1)
+_Greatest = _Bound(1)
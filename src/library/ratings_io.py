@@ -0,0 +1,169 @@
+"""
+Bulk export and import of the ratings history. Exports contain the raw form inputs of every rating alongside the
+memberships of every derived attribute, written column-wise in chunks so that the whole history never needs to sit in
+memory at once. Parquet and Feather require pyarrow; without it, exports fall back to CSV, written next to the
+requested path with a .csv extension.
+"""
+import os
+import warnings
+
+import pandas as pd
+
+from src.library.database import COLUMNS, NAME_COLUMNS, insert_ratings
+from src.library.demorgans_tripple import Triple, Godel
+from src.library.rule_engine import evaluate_batch, derived_attributes
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather  # noqa: F401 (registers the feather/ipc readers)
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+FORMATS = ("parquet", "feather", "csv")
+
+# derived memberships are exported as "<attribute>.<level>", e.g. "tyrant.high"
+DERIVED_COLUMNS = [key + "." + rule[1] for key, value in derived_attributes.items() for rule in value[1]]
+RAW_COLUMNS = list(COLUMNS.keys())
+ALL_COLUMNS = NAME_COLUMNS + RAW_COLUMNS + DERIVED_COLUMNS
+
+
+def _resolve_format(path, fmt):
+    if fmt is None:
+        fmt = os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise Exception("Unsupported export format: " + str(fmt))
+    if fmt != "csv" and pa is None:
+        # readers pick the format from the extension, so CSV must not be written under a .parquet/.feather name
+        path = os.path.splitext(path)[0] + ".csv"
+        warnings.warn("pyarrow is not installed, falling back to CSV at " + path)
+        fmt = "csv"
+    return path, fmt
+
+
+def _arrow_schema(columns):
+    # fixed up front, as a chunk whose nullable column is entirely NULL would otherwise be inferred as type null
+    return pa.schema([(column, pa.string() if column in NAME_COLUMNS else pa.float64()) for column in columns])
+
+
+def score_frame(frame, columns=None, triple: Triple = Godel):
+    """
+    Appends the derived memberships to a frame of raw ratings, and prunes it down to the requested columns.
+    :param frame: a DataFrame containing (at least) every raw attribute column
+    :param columns: the columns to keep, defaults to ALL_COLUMNS
+    :param triple: the De Morgan triple used to resolve the rules
+    :return: a new DataFrame
+    """
+    if columns is None:
+        columns = ALL_COLUMNS
+    result = {}
+    if any(column in DERIVED_COLUMNS for column in columns):
+        valuation = evaluate_batch({key: frame[key].to_numpy() for key in RAW_COLUMNS}, triple)
+        for key, memberships in valuation.items():
+            for level, values in memberships.items():
+                result[key + "." + level] = values
+    for column in columns:
+        if column not in result:
+            result[column] = frame[column].to_numpy() if column in frame else None
+    return pd.DataFrame({column: result[column] for column in columns}, index=frame.index)
+
+
+def export_ratings(connection, path, columns=None, fmt=None, chunksize: int = 100000, triple: Triple = Godel):
+    """
+    Streams the professors table into a columnar file.
+    :param connection: an open DB-API connection to the ratings database
+    :param path: the file to write
+    :param columns: the columns to export, any of ALL_COLUMNS; defaults to all of them
+    :param fmt: one of FORMATS, inferred from the file extension when omitted
+    :param chunksize: the number of rows read, scored and written at a time
+    :param triple: the De Morgan triple used to resolve the derived memberships
+    :return: the number of rows written, and the path actually written to (which ends in .csv after a fallback)
+    """
+    path, fmt = _resolve_format(path, fmt)
+    if columns is None:
+        columns = ALL_COLUMNS
+    unknown = [column for column in columns if column not in ALL_COLUMNS]
+    if unknown:
+        raise Exception("Unknown export columns: " + ", ".join(unknown))
+
+    # only pull what is needed; every raw column is needed as soon as a derived membership is requested
+    if any(column in DERIVED_COLUMNS for column in columns):
+        source = [column for column in NAME_COLUMNS if column in columns] + RAW_COLUMNS
+    else:
+        source = [column for column in columns if column not in DERIVED_COLUMNS]
+    renames = {COLUMNS[key]: key for key in source if key in COLUMNS}
+    query = "SELECT {} FROM professors ORDER BY ID".format(
+        ", ".join([COLUMNS[key] if key in COLUMNS else key for key in source]))
+
+    # the arrow writers are opened before the first chunk, so an empty export still leaves a readable file behind
+    schema = None
+    writer = None
+    if fmt != "csv":
+        schema = _arrow_schema(columns)
+        writer = pq.ParquetWriter(path, schema) if fmt == "parquet" else pa.ipc.new_file(path, schema)
+
+    written = 0
+    try:
+        for chunk in pd.read_sql(query, connection, chunksize=chunksize):
+            frame = score_frame(chunk.rename(columns=renames), columns, triple)
+            if fmt == "csv":
+                frame.to_csv(path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+            else:
+                writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            written += len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if written == 0 and fmt == "csv":
+        pd.DataFrame(columns=columns).to_csv(path, index=False)
+    return written, path
+
+
+def _read_chunks(path, fmt, columns, chunksize):
+    if fmt == "csv":
+        for chunk in pd.read_csv(path, usecols=lambda column: column in columns, chunksize=chunksize):
+            yield chunk
+    elif fmt == "parquet":
+        parquet = pq.ParquetFile(path)
+        present = [column for column in columns if column in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=present):
+            yield batch.to_pandas()
+    else:
+        reader = pa.ipc.open_file(path)
+        present = [column for column in columns if column in reader.schema.names]
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i).select(present).to_pandas()
+
+
+def import_ratings(connection, path, fmt=None, chunksize: int = 100000, placeholder: str = "?"):
+    """
+    Loads ratings from an export file into the professors table. Derived memberships in the file are ignored, as they
+    are recomputed from the raw inputs whenever they are needed.
+    :param connection: an open DB-API connection to the ratings database
+    :param path: a file written by export_ratings (or any file with the same raw columns)
+    :param fmt: one of FORMATS, inferred from the file extension when omitted
+    :param chunksize: the number of rows read and handed to executemany at a time
+    :param placeholder: the parameter marker of the driver, "?" for sqlite3 and "%s" for the MySQL connectors
+    :return: the number of rows loaded
+    """
+    fmt = os.path.splitext(path)[1].lstrip(".").lower() if fmt is None else fmt
+    if fmt not in FORMATS:
+        raise Exception("Unsupported import format: " + str(fmt))
+    if fmt != "csv" and pa is None:
+        raise Exception("pyarrow is required to import " + fmt + " files")
+
+    loaded = 0
+    for chunk in _read_chunks(path, fmt, NAME_COLUMNS + RAW_COLUMNS, chunksize):
+        missing = [key for key in RAW_COLUMNS if key not in chunk]
+        if missing:
+            raise Exception("Import file is missing raw columns: " + ", ".join(missing))
+        for column in NAME_COLUMNS:
+            if column not in chunk:
+                chunk[column] = None
+        # DB-API drivers expect None rather than NaN for missing values
+        chunk = chunk[NAME_COLUMNS + RAW_COLUMNS]
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        loaded += insert_ratings(connection, chunk.itertuples(index=False, name=None), chunksize, placeholder)
+    return loaded
@@ -0,0 +1,125 @@
+"""
+A compact, memory-mapped store for the derived memberships of very large scored datasets. Results are kept in a single
+.npy file laid out as one contiguous column per (attribute, level) pair, so any number of processes can map the same
+file read-only and slice it without copying. The (attribute, level) label of every column is kept beside the data in
+a small "<path>.fields.json" file, and is checked whenever the store is opened.
+"""
+import json
+
+import numpy as np
+
+from src.library.demorgans_tripple import Triple, Godel
+from src.library.rule_engine import evaluate_batch, derived_attributes
+
+# the fixed schema of every store, in the same order evaluate produces its keys
+FIELDS = [(key, rule[1]) for key, value in derived_attributes.items() for rule in value[1]]
+_FIELD_INDEX = {field: i for i, field in enumerate(FIELDS)}
+
+
+def _fields_path(path):
+    return str(path) + ".fields.json"
+
+
+class ResultStore:
+    def __init__(self, path, mode: str = "r"):
+        """
+        Maps an existing store.
+        :param path: a file written by ResultStore.create
+        :param mode: "r" to share the file read-only, "r+" to update it in place
+        """
+        self.path = path
+        try:
+            with open(_fields_path(path)) as file:
+                fields = [tuple(field) for field in json.load(file)["fields"]]
+        except FileNotFoundError:
+            raise Exception("Result store is missing its field list: " + _fields_path(path))
+        if fields != FIELDS:
+            raise Exception("Result store was written for different derived attribute rules: " + str(path))
+        self._data = np.load(path, mmap_mode=mode)
+        if self._data.ndim != 2 or self._data.shape[0] != len(FIELDS):
+            raise Exception("Result store does not match its field list: " + str(path))
+
+    @classmethod
+    def create(cls, path, rows: int, dtype=np.float64):
+        """
+        Allocates a new store on disk, filled with zeros.
+        :param path: the file to create
+        :param rows: the number of scored ratings the store will hold
+        :param dtype: np.float64, or np.float32 to halve the file size
+        :return: a writable ResultStore
+        """
+        np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(len(FIELDS), rows)).flush()
+        with open(_fields_path(path), "w") as file:
+            json.dump({"fields": FIELDS}, file)
+        return cls(path, mode="r+")
+
+    def __len__(self):
+        return self._data.shape[1]
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    def get(self, attribute, level):
+        """
+        The memberships of every rating in one level of a derived attribute, e.g. get("tyrant", "high").
+        :return: a read-only (or, in "r+" mode, writable) view into the mapped file
+        """
+        return self._data[_FIELD_INDEX[(attribute, level)]]
+
+    def attribute(self, attribute):
+        """
+        :return: a dict mapping each level of the attribute to its column view
+        """
+        return {level: self._data[i] for (key, level), i in _FIELD_INDEX.items() if key == attribute}
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            return self.get(*key)
+        return self.attribute(key)
+
+    def row(self, i: int):
+        """
+        A single scored rating, in the same nested form evaluate returns.
+        """
+        result = {}
+        for (key, level), value in zip(FIELDS, self._data[:, i].tolist()):
+            result.setdefault(key, {})[level] = value
+        return result
+
+    def write(self, start: int, valuation):
+        """
+        Copies a batch of results into the store.
+        :param start: the row the batch begins at
+        :param valuation: the output of evaluate_batch
+        :return: the row following the batch
+        """
+        end = start
+        for i, (key, level) in enumerate(FIELDS):
+            column = valuation[key][level]
+            end = start + len(column)
+            self._data[i, start:end] = column
+        return end
+
+    def flush(self):
+        self._data.flush()
+
+
+def score_into(path, variable_columns, batch_size: int = 1000000, triple: Triple = Godel, dtype=np.float64):
+    """
+    Scores a large dataset batch by batch, writing straight into a new store so the full set of results is never held
+    in memory.
+    :param path: the store to create
+    :param variable_columns: a dict mapping every raw attribute to an equal length array of values
+    :param batch_size: the number of ratings evaluated at a time
+    :param triple: the De Morgan triple used to resolve the rules
+    :param dtype: the dtype of the store
+    :return: the populated ResultStore, opened read-only
+    """
+    rows = len(next(iter(variable_columns.values())))
+    store = ResultStore.create(path, rows, dtype)
+    for start in range(0, rows, batch_size):
+        batch = {key: value[start:start + batch_size] for key, value in variable_columns.items()}
+        store.write(start, evaluate_batch(batch, triple))
+    store.flush()
+    return ResultStore(path)
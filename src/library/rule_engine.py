@@ -1,7 +1,9 @@
 from enum import Enum
 
-from src.library.demorgans_tripple import Triple, Godel
-from src.library.inference_systems import Mamdani
+import numpy as np
+
+from src.library.demorgans_tripple import Triple, Godel, ARRAY_TRIPLES
+from src.library.inference_systems import InferenceType, Mamdani
 
 
 class OP(Enum):    # sets are defined as (attribute, set)
@@ -55,7 +57,7 @@ class FuzzySet:
         l_tri_area = (self.x[1] - self.x[0]) * height/2
         l_tri_cog = self.x[0] + (self.x[1]-self.x[0]) * 2/3     # is this wrong? it was in Prof. Dawes work.
         rect_area = (self.x[2] - self.x[1]) * height
-        rect_cog = (self.x[2] - self.x[1])/2
+        rect_cog = (self.x[1] + self.x[2])/2
         r_tri_area = (self.x[3] - self.x[2]) * height/2
         r_tri_cog = self.x[2] + (self.x[3] - self.x[2])/3
 
@@ -101,6 +103,14 @@ class FuzzySet:
         slope = (self.y[upper_bound] - self.y[lower_bound])/(self.x[upper_bound] - self.x[lower_bound])
         return self.y[lower_bound] + slope*(x-self.x[lower_bound])
 
+    def membership_array(self, xs):
+        """
+        Vectorized membership, equivalent to calling membership on every element of xs.
+        :param xs: a numpy array of crisp values
+        :return: a numpy array of memberships
+        """
+        return np.interp(xs, self.x, self.y, left=0.0, right=0.0)
+
 
 class FuzzyAttribute:
     def __init__(self, name: str = ""):
@@ -114,6 +124,9 @@ class FuzzyAttribute:
     def get_membership(self, value):
         return {fuz.name: fuz.membership(value) for fuz in self.sets.values()}
 
+    def get_membership_array(self, values):
+        return {fuz.name: fuz.membership_array(values) for fuz in self.sets.values()}
+
 
 class Rule:
     def __init__(self, antecedents : [FuzzySet], consequents : [FuzzySet], name = ""):
@@ -283,29 +296,49 @@ derived_attributes = {"tyrant":                 (_TRINARY_SPREAD, [
                           (OP.THEN, "low", (OP.OR, ("career_length", "low"), ("tenure", "no"), ("repeat_instruction", "low")))
                       ])}
 
+# attribute objects for the raw and derived sets, these are only ever read so they can be shared between evaluations
+_RAW_SETS = {key: generate_generic_attribute(name=key, member_sets=value) for key, value in raw_attributes.items()}
+_DERIVED_SETS = {key: generate_generic_attribute(name=key, member_sets=value[0]) for key, value in derived_attributes.items()}
+
 final_attribute = {"quality":                 (_BROAD_SPREAD, [
                                                     # if (EMPATHY is VERY LOW) and (WORKLOAD is VERY HIGH) and (ASSESSMENT_VALUES is VERY LOW) then TYRANT is HIGH
                                                     (OP.THEN, "very high", (OP.AND, ("expertise", "high"), (OP.AND, ("communicator", "high"), (OP.AND, ("organizer", "high"), (OP.AND, (OP.OR, ("neurotic", "low"), ("neurotic", "medium")), (OP.AND, (""), ()))))))
                       ])}
 
 
-def resolve(rules, sets, triple: Triple = Godel):
+def resolve(rules, sets, triple: Triple = Godel, hook=None, path=None):
+    """
+    Resolves a rule tree against the memberships in sets.
+    :param hook: an optional observer (see src.library.tracing.Tracer), told of every node as visit(node, path) and of
+    every run of branches left unevaluated by short-circuiting as skip(path, count); without one no paths are built
+    :param path: the path of this node, "<parent path>/<child index>", only used with a hook
+    """
+    if hook is not None:
+        hook.visit(rules, path)
     unary_ops = [OP.THEN, OP.NOT]
     binary_ops = [OP.AND, OP.OR]
     if rules[0] in unary_ops:
+        child_path = None if hook is None else path + "/0"
         if rules[0] == OP.THEN:             # OP.THEN, Affected Set, (fuzzy fluents)
-            return resolve(rules[2], sets, triple)
+            return resolve(rules[2], sets, triple, hook, child_path)
         elif rules[0] == OP.NOT:
-            return triple.neg(resolve(rules[1], sets, triple))
+            return triple.neg(resolve(rules[1], sets, triple, hook, child_path))
 
     elif rules[0] in binary_ops:
-        resolutions = [resolve(rule, sets, triple) for rule in rules[1:]]
-        value = resolutions[0]
-        for r in resolutions[1:]:
+        # every t-norm maps 0 to 0 and every t-conorm maps 1 to 1, so once a single (non-batched) value reaches the
+        # absorbing element the remaining branches cannot change the result
+        absorbing = 0 if rules[0] == OP.AND else 1
+        value = resolve(rules[1], sets, triple, hook, None if hook is None else path + "/0")
+        for i, rule in enumerate(rules[2:], 1):
+            if not isinstance(value, np.ndarray) and value == absorbing:
+                if hook is not None:
+                    hook.skip(path, len(rules) - 1 - i)
+                break
+            child = resolve(rule, sets, triple, hook, None if hook is None else path + "/" + str(i))
             if rules[0] == OP.AND:
-                value = triple.t(value, r)
+                value = triple.t(value, child)
             elif rules[0] == OP.OR:
-                value = triple.s(value, r)
+                value = triple.s(value, child)
         return value
 
     else:
@@ -327,23 +360,43 @@ def resolve(rule, sets, triple: Triple = Godel):
 
 
 # Production Rules
-def evaluate(variable_dict, triple: Triple = Godel):
-    base_valuation = {}
-    # get valuations in all base sets.
-    for key, value in variable_dict.items():
-        base_valuation[key] = generate_generic_attribute(name=key, member_sets=raw_attributes[key]).get_membership(value)
-
-    derived_attribute = {}
+def fuzzify(variable_dict):
+    """
+    The first stage of evaluate: the membership of every raw value in each of its attribute's sets.
+    :param variable_dict: the raw slider values, keyed as in raw_attributes
+    :return: a dict mapping each raw attribute to the memberships of its sets
+    """
+    return {key: _RAW_SETS[key].get_membership(value) for key, value in variable_dict.items()}
+
+
+def infer(base_valuation, triple: Triple = Godel, tracer=None):
+    """
+    The second stage of evaluate: resolves every derived attribute rule against the fuzzified inputs.
+    :param base_valuation: the output of fuzzify
+    :return: a dict mapping each derived attribute to the memberships of its levels
+    """
     derived_valuation = {}
     for key, value in derived_attributes.items():
-        derived_attribute[key] = generate_generic_attribute(name=key, member_sets=value[0])
         derived_valuation[key] = {}
         for rule in value[1]:
-            derived_valuation[key][rule[1]] = resolve(rule, base_valuation)
-
-
+            if tracer is None:
+                derived_valuation[key][rule[1]] = resolve(rule, base_valuation, triple)
+            else:
+                derived_valuation[key][rule[1]] = tracer.trace_rule(key, rule, base_valuation, triple)
+    return derived_valuation
 
 
+def evaluate(variable_dict, triple: Triple = Godel, tracer=None):
+    """
+    Evaluates every derived attribute for a single rating.
+    :param variable_dict: the raw slider values, keyed as in raw_attributes
+    :param triple: the De Morgan triple used to resolve the rules
+    :param tracer: an optional src.library.tracing.Tracer, which records the time and firing strength of every rule
+    :return: a dict mapping each derived attribute to the memberships of its levels
+    """
+    # get valuations in all base sets.
+    base_valuation = fuzzify(variable_dict)
+    derived_valuation = infer(base_valuation, triple, tracer)
 
     # defuzzify and get cogs of the above
     #m = Mamdani()
@@ -363,6 +416,49 @@ def evaluate(variable_dict, triple: Triple = Godel):
     # if ((INCOMPOTENT is HIGH) or (OVER_THE_HILL is HIGH)) AND (NEUROTIC is HIGH) then OVERALL_Quality is (LOW)
 
 
+def evaluate_batch(variable_columns, triple: Triple = Godel):
+    """
+    Evaluates many ratings at once. Each raw attribute is supplied as a column of values, and every rule is resolved
+    over whole columns using the array form of the chosen triple.
+    :param variable_columns: a dict mapping every raw attribute to an equal length sequence of values
+    :param triple: the De Morgan triple used to resolve the rules
+    :return: the same nested dict as evaluate, with numpy arrays in place of single memberships
+    """
+    array_triple = ARRAY_TRIPLES[triple]
+    base_valuation = {}
+    for key, value in variable_columns.items():
+        base_valuation[key] = _RAW_SETS[key].get_membership_array(np.asarray(value, dtype=float))
+
+    derived_valuation = {}
+    for key, value in derived_attributes.items():
+        derived_valuation[key] = {}
+        for rule in value[1]:
+            derived_valuation[key][rule[1]] = resolve(rule, base_valuation, array_triple)
+    return derived_valuation
+
+
+def defuzzify(derived_valuation, inference: InferenceType = None):
+    """
+    Collapses the memberships produced by evaluate into a single crisp value for each derived attribute.
+    :param derived_valuation: the output of evaluate
+    :param inference: the inference system used to resolve each attribute, defaults to a center of gravity Mamdani
+    :return: a dict mapping each derived attribute to its crisp value, or None when none of its rules fired
+    """
+    if inference is None:
+        inference = Mamdani()
+    return {key: inference.resolve(_DERIVED_SETS[key], memberships) for key, memberships in derived_valuation.items()}
+
+
+def defuzzify_batch(derived_valuation, inference: InferenceType = None):
+    """
+    Vectorized defuzzify, for the output of evaluate_batch.
+    :return: a dict mapping each derived attribute to a numpy array of crisp values, NaN where none of its rules fired
+    """
+    if inference is None:
+        inference = Mamdani()
+    return {key: inference.resolve_array(_DERIVED_SETS[key], memberships) for key, memberships in derived_valuation.items()}
+
+
 evaluate({
     "email_speed": 1.0,
     "public_speaking": 1.0,
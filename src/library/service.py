@@ -0,0 +1,278 @@
+"""
+A small local HTTP/JSON scoring service, so that other tools can score ratings without going through the streamlit UI.
+
+    POST /evaluate          a single rating (the bulk_representation dict built by the rating form), returns the
+                            evaluate output for it
+    POST /evaluate/batch    a list of ratings, returns a list of evaluate outputs
+    GET  /health            liveness check
+
+Concurrent single requests are gathered into micro-batches: the first request of a batch waits at most max_delay
+seconds for others to arrive, and the whole batch is then scored with one evaluate_batch call.
+
+Run it with: python -m src.library.service --port 8467
+"""
+import argparse
+import asyncio
+import json
+import math
+
+from src.library.demorgans_tripple import Triple, Godel
+from src.library.rule_engine import evaluate_batch, raw_attributes
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+            500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    def __init__(self, message, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _validate(rating):
+    if not isinstance(rating, dict):
+        raise RequestError("a rating must be a JSON object")
+    missing = [key for key in raw_attributes if key not in rating]
+    unknown = [key for key in rating if key not in raw_attributes]
+    if missing or unknown:
+        raise RequestError("missing keys: {}; unknown keys: {}".format(missing, unknown))
+    validated = {}
+    for key, value in rating.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise RequestError("value of " + key + " must be a number")
+        try:
+            validated[key] = float(value)
+        except OverflowError:
+            raise RequestError("value of " + key + " is too large")
+        if not math.isfinite(validated[key]):
+            raise RequestError("value of " + key + " must be finite")
+    return validated
+
+
+def score_batch(ratings, triple: Triple = Godel):
+    """
+    Scores a list of validated ratings in a single vectorized call.
+    :return: a list holding the evaluate output of every rating, in order
+    """
+    valuation = evaluate_batch({key: [rating[key] for rating in ratings] for key in raw_attributes}, triple)
+    results = [{} for _ in ratings]
+    for key, levels in valuation.items():
+        for level, values in levels.items():
+            for result, value in zip(results, values.tolist()):
+                result.setdefault(key, {})[level] = value
+    return results
+
+
+class MicroBatcher:
+    def __init__(self, max_batch: int = 256, max_delay: float = 0.002, triple: Triple = Godel):
+        """
+        Gathers individually submitted ratings into batches.
+        :param max_batch: a batch is scored as soon as it holds this many ratings
+        :param max_delay: the longest, in seconds, the first rating of a batch waits for others
+        :param triple: the De Morgan triple used to resolve the rules
+        """
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.triple = triple
+        self.batches = 0
+        self._queue = None
+        self._worker = None
+        self._loop = None
+
+    async def submit(self, rating):
+        """
+        Queues a validated rating and waits for its batch to be scored.
+        :return: the evaluate output for the rating
+        """
+        loop = asyncio.get_running_loop()
+        # the queue and worker belong to the loop they were made on, so start afresh on a new loop (e.g. a second
+        # asyncio.run) or if the worker has stopped, rather than queueing into something nobody reads
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        future = loop.create_future()
+        await self._queue.put((rating, future))
+        return await future
+
+    async def close(self):
+        # a worker left on a loop that has since closed died with it, and cannot be awaited from this one
+        if self._worker is not None and self._loop is asyncio.get_running_loop():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        self._queue = None
+        self._loop = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            self.batches += 1
+            try:
+                results = await loop.run_in_executor(None, score_batch, [rating for rating, _ in batch], self.triple)
+            except Exception:
+                # one bad rating must not fail the requests it happened to be batched with, so fall back to scoring
+                # each on its own and only fail the ones that cannot be scored
+                for rating, future in batch:
+                    try:
+                        result = (await loop.run_in_executor(None, score_batch, [rating], self.triple))[0]
+                    except Exception as e:
+                        if not future.done():
+                            future.set_exception(e)
+                    else:
+                        if not future.done():
+                            future.set_result(result)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+
+class ScoringService:
+    def __init__(self, max_batch: int = 256, max_delay: float = 0.002, max_body: int = 1 << 24,
+                 triple: Triple = Godel):
+        """
+        :param max_batch: see MicroBatcher
+        :param max_delay: see MicroBatcher
+        :param max_body: the largest request body accepted, in bytes
+        :param triple: the De Morgan triple used to resolve the rules
+        """
+        self.batcher = MicroBatcher(max_batch, max_delay, triple)
+        self.max_body = max_body
+        self.triple = triple
+
+    async def handle(self, method: str, path: str, body: bytes = b""):
+        """
+        Routes a single request; this is the whole service minus the HTTP framing.
+        :return: a (status, JSON-serializable payload) pair
+        """
+        try:
+            if path == "/health":
+                if method != "GET":
+                    raise RequestError("use GET", 405)
+                return 200, {"status": "ok"}
+            if path not in ("/evaluate", "/evaluate/batch"):
+                raise RequestError("no such endpoint: " + path, 404)
+            if method != "POST":
+                raise RequestError("use POST", 405)
+
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                raise RequestError("body is not valid JSON")
+
+            if path == "/evaluate":
+                return 200, await self.batcher.submit(_validate(payload))
+            if not isinstance(payload, list):
+                raise RequestError("a batch must be a JSON list of ratings")
+            ratings = [_validate(rating) for rating in payload]
+            if not ratings:
+                return 200, []
+            loop = asyncio.get_running_loop()
+            return 200, await loop.run_in_executor(None, score_batch, ratings, self.triple)
+        except RequestError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": "could not score request: " + str(e)}
+
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > self.max_body:
+                    status, payload = 413, {"error": "body too large"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.handle(method, path.split("?")[0], body)
+                    keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                data = json.dumps(payload).encode()
+                writer.write("HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n{}\r\n".format(
+                    status, _REASONS[status], len(data), "" if keep_alive else "Connection: close\r\n").encode()
+                    + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8467):
+        """
+        Starts listening; the returned asyncio server must be kept alive (e.g. with serve_forever).
+        """
+        return await asyncio.start_server(self._connection, host, port)
+
+    async def close(self):
+        await self.batcher.close()
+
+
+class LocalClient:
+    def __init__(self, service: ScoringService):
+        """
+        An in-process client that talks to a service without opening a socket, for tests and embedding.
+        JSON is still round-tripped so that responses match what an HTTP client would see.
+        """
+        self.service = service
+
+    async def request(self, method: str, path: str, payload=None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        status, response = await self.service.handle(method, path, body)
+        return status, json.loads(json.dumps(response))
+
+    async def evaluate(self, rating):
+        return await self.request("POST", "/evaluate", rating)
+
+    async def evaluate_batch(self, ratings):
+        return await self.request("POST", "/evaluate/batch", ratings)
+
+
+async def _serve(host, port, max_batch, max_delay):
+    service = ScoringService(max_batch, max_delay)
+    server = await service.start(host, port)
+    try:
+        await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local scoring service for the professor rating system")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8467)
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-delay", type=float, default=0.002, help="seconds a request may wait for its batch")
+    args = parser.parse_args()
+    asyncio.run(_serve(args.host, args.port, args.max_batch, args.max_delay))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Response surfaces and sensitivity analysis for tuning the spreads in the rule engine. A sweep varies one or two raw
+inputs over a dense grid (or any number of them by Monte Carlo sampling) while holding the others fixed, and evaluates
+every point as a single batch.
+"""
+import numpy as np
+
+from src.library.demorgans_tripple import Triple, Godel
+from src.library.rule_engine import evaluate_batch, defuzzify_batch, raw_attributes
+
+# points are evaluated in chunks of this size to bound memory use
+CHUNK_SIZE = 1 << 17
+
+
+class SweepResult:
+    def __init__(self, inputs, memberships, scores):
+        """
+        The outcome of a sweep. Every array shares the shape of the sweep (points for 1-D and Monte Carlo sweeps,
+        points x points for 2-D sweeps).
+        :param inputs: a dict mapping each swept raw attribute to its value at every point
+        :param memberships: the evaluate_batch output at every point
+        :param scores: the defuzzified value of every derived attribute at every point
+        """
+        self.inputs = inputs
+        self.memberships = memberships
+        self.scores = scores
+
+    @property
+    def shape(self):
+        return next(iter(self.inputs.values())).shape
+
+    def sensitivity(self, bins: int = 50):
+        """
+        First-order sensitivity index of every derived attribute to every swept input: the share of the attribute's
+        variance explained by that input alone, estimated as the variance of its binned conditional mean.
+        :param bins: the number of equal-width bins each input is split into
+        :return: a dict mapping each derived attribute to a dict of {input: index between 0 and 1}
+        """
+        return {key: {name: first_order_index(values, score, bins) for name, values in self.inputs.items()}
+                for key, score in self.scores.items()}
+
+
+def first_order_index(x, y, bins: int = 50):
+    """
+    Estimates Var(E[y|x]) / Var(y) by splitting x into equal-width bins. Points where y is NaN (no rule fired) are
+    left out.
+    """
+    x = np.ravel(x)
+    y = np.ravel(y)
+    defined = ~np.isnan(y)
+    x, y = x[defined], y[defined]
+    if len(y) == 0:
+        return 0.0
+    # a score that is constant up to round-off has no variance to explain, and dividing by ~1e-32 would give nonsense
+    if np.ptp(y) <= 1e-12 * max(1.0, float(np.abs(y).max())):
+        return 0.0
+    variance = y.var()
+    low, high = x.min(), x.max()
+    if high == low:
+        return 0.0
+    index = np.minimum(((x - low) / (high - low) * bins).astype(int), bins - 1)
+    counts = np.bincount(index, minlength=bins)
+    means = np.bincount(index, weights=y, minlength=bins)[counts > 0] / counts[counts > 0]
+    return min(float(np.sum(counts[counts > 0] * (means - y.mean()) ** 2) / len(y) / variance), 1.0)
+
+
+def baseline(value: float = 0.5):
+    """
+    A rating with every raw attribute set to the same value, used for any input a sweep does not vary.
+    """
+    return {key: value for key in raw_attributes}
+
+
+def _evaluate(inputs, fixed, triple):
+    # inputs that are held fixed stay scalars and are broadcast against the swept columns by numpy
+    fixed = baseline() if fixed is None else {**baseline(), **fixed}
+    for key in inputs:
+        if key not in raw_attributes:
+            raise Exception("Unknown raw attribute: " + str(key))
+    shape = next(iter(inputs.values())).shape
+    flat = {key: value.ravel() for key, value in inputs.items()}
+    size = int(np.prod(shape))
+
+    memberships = {}
+    scores = {}
+    for start in range(0, size, CHUNK_SIZE):
+        columns = {key: flat[key][start:start + CHUNK_SIZE] if key in flat else np.float64(value)
+                   for key, value in fixed.items()}
+        length = min(CHUNK_SIZE, size - start)
+        valuation = evaluate_batch(columns, triple)
+        crisp = defuzzify_batch(valuation)
+        for key, levels in valuation.items():
+            for level, values in levels.items():
+                memberships.setdefault(key, {}).setdefault(level, []).append(np.broadcast_to(values, (length,)))
+            scores.setdefault(key, []).append(np.broadcast_to(crisp[key], (length,)))
+
+    memberships = {key: {level: np.concatenate(values).reshape(shape) for level, values in levels.items()}
+                   for key, levels in memberships.items()}
+    scores = {key: np.concatenate(values).reshape(shape) for key, values in scores.items()}
+    return SweepResult(inputs, memberships, scores)
+
+
+def sweep_1d(key, points: int = 101, low: float = 0.0, high: float = 1.0, fixed=None, triple: Triple = Godel):
+    """
+    Varies a single raw attribute over an evenly spaced grid.
+    :param key: the raw attribute to vary
+    :param points: the number of grid points
+    :param low: the first grid value
+    :param high: the last grid value
+    :param fixed: values for the other raw attributes, any that are omitted are taken from baseline()
+    :param triple: the De Morgan triple used to resolve the rules
+    :return: a SweepResult of shape (points,)
+    """
+    return _evaluate({key: np.linspace(low, high, points)}, fixed, triple)
+
+
+def sweep_2d(keys, points=101, low: float = 0.0, high: float = 1.0, fixed=None, triple: Triple = Godel):
+    """
+    Varies two raw attributes over an evenly spaced grid.
+    :param keys: the pair of raw attributes to vary; the first indexes rows, the second columns
+    :param points: the number of grid points along each axis, or a pair of counts
+    :return: a SweepResult of shape (points, points)
+    """
+    if isinstance(points, int):
+        points = (points, points)
+    rows, columns = np.meshgrid(np.linspace(low, high, points[0]), np.linspace(low, high, points[1]), indexing="ij")
+    return _evaluate({keys[0]: rows, keys[1]: columns}, fixed, triple)
+
+
+def monte_carlo(keys=None, samples: int = 100000, low: float = 0.0, high: float = 1.0, fixed=None, seed=None,
+                triple: Triple = Godel):
+    """
+    Draws every chosen raw attribute independently and uniformly, for estimating sensitivities across many inputs.
+    :param keys: the raw attributes to vary, defaults to all of them
+    :param samples: the number of points drawn
+    :param seed: seed for the random generator, for reproducible sweeps
+    :return: a SweepResult of shape (samples,)
+    """
+    if keys is None:
+        keys = list(raw_attributes.keys())
+    generator = np.random.default_rng(seed)
+    return _evaluate({key: generator.uniform(low, high, samples) for key in keys}, fixed, triple)
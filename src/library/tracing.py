@@ -0,0 +1,150 @@
+"""
+Opt-in instrumentation for evaluate. Passing a Tracer to evaluate records, for every derived attribute rule, how long
+it took to resolve and how strongly it fired, and for every node of the rule tree how often it was visited and how many
+of its branches were skipped because the result was already decided.
+
+    tracer = Tracer()
+    evaluate(rating, tracer=tracer)
+    tracer.summary()                  # aggregate counters and percentiles
+    tracer.export("trace.folded")     # for flamegraph.pl / speedscope
+    tracer.export("trace.json")       # for chrome://tracing / perfetto
+
+Without a tracer evaluate takes its usual path and resolve builds no node paths, so leaving tracing off costs next to
+nothing.
+"""
+import json
+import time
+
+import numpy as np
+
+from src.library.demorgans_tripple import Triple, Godel
+from src.library.rule_engine import OP, resolve
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    """
+    :return: a dict mapping "p<point>" to the percentile of samples, or an empty dict when there are none
+    """
+    if len(samples) == 0:
+        return {}
+    values = np.percentile(samples, points)
+    return {"p{}".format(point): float(value) for point, value in zip(points, values)}
+
+
+def _describe(node):
+    if node[0] == OP.THEN:
+        return "THEN " + node[1]
+    if isinstance(node[0], OP):
+        return node[0].name
+    return "{} is {}".format(node[0], node[1])
+
+
+class Tracer:
+    def __init__(self, keep_events: bool = True):
+        """
+        :param keep_events: keep every individual rule resolution for export; turn this off to only keep counters when
+        tracing a long run
+        """
+        self.keep_events = keep_events
+        self.rule_times = {}
+        self.firing_strengths = {}
+        self.visits = {}
+        self.skipped = {}
+        self.descriptions = {}
+        self.events = []
+        self._origin = time.perf_counter()
+
+    def trace_rule(self, attribute, rule, sets, triple: Triple = Godel):
+        """
+        Resolves a single derived attribute rule with rule_engine.resolve, recording it along the way.
+        :param attribute: the derived attribute the rule belongs to
+        :return: the firing strength of the rule
+        """
+        name = attribute + "/" + rule[1]
+        start = time.perf_counter()
+        strength = resolve(rule, sets, triple, hook=self, path=name)
+        seconds = time.perf_counter() - start
+
+        self.rule_times.setdefault(name, []).append(seconds)
+        self.firing_strengths.setdefault(name, []).append(float(strength))
+        if self.keep_events:
+            self.events.append({"attribute": attribute, "level": rule[1], "start": start - self._origin,
+                                "seconds": seconds, "strength": float(strength)})
+        return strength
+
+    def visit(self, node, path):
+        """
+        Called by rule_engine.resolve for every node of a rule tree it resolves.
+        """
+        self.visits[path] = self.visits.get(path, 0) + 1
+        if path not in self.descriptions:
+            self.descriptions[path] = _describe(node)
+
+    def skip(self, path, count: int):
+        """
+        Called by rule_engine.resolve when the node at path short-circuits with count branches left unevaluated.
+        """
+        self.skipped[path] = self.skipped.get(path, 0) + count
+
+    def summary(self, points=(50, 95, 99)):
+        """
+        Aggregates everything traced so far.
+        :return: {"rules": {"<attribute>/<level>": {...}}, "nodes": {"<path>": {...}}}, with times in seconds
+        """
+        rules = {}
+        for name, times in self.rule_times.items():
+            strengths = self.firing_strengths[name]
+            rules[name] = {"calls": len(times),
+                           "total_seconds": float(sum(times)),
+                           "seconds": percentiles(times, points),
+                           "mean_strength": float(np.mean(strengths)),
+                           "strength": percentiles(strengths, points),
+                           "fired": sum(1 for strength in strengths if strength > 0)}
+        nodes = {path: {"node": self.descriptions[path], "visits": visits, "skipped": self.skipped.get(path, 0)}
+                 for path, visits in self.visits.items()}
+        return {"rules": rules, "nodes": nodes}
+
+    def folded(self):
+        """
+        The total time spent in each rule as folded stacks ("evaluate;<attribute>;<level> <microseconds>"), the input
+        format of flamegraph.pl and speedscope.
+        """
+        lines = []
+        for name, times in self.rule_times.items():
+            attribute, level = name.split("/", 1)
+            lines.append("evaluate;{};{} {}".format(attribute, level, int(round(sum(times) * 1e6))))
+        return "\n".join(lines) + "\n"
+
+    def chrome_trace(self):
+        """
+        Every recorded rule resolution as a complete event of the Chrome trace event format.
+        """
+        return {"traceEvents": [{"name": event["attribute"] + "/" + event["level"],
+                                 "cat": event["attribute"],
+                                 "ph": "X",
+                                 "ts": event["start"] * 1e6,
+                                 "dur": event["seconds"] * 1e6,
+                                 "pid": 0,
+                                 "tid": 0,
+                                 "args": {"strength": event["strength"]}} for event in self.events]}
+
+    def export(self, path, fmt=None):
+        """
+        Writes the trace to disk.
+        :param fmt: "folded", "chrome" or "summary"; when omitted, .folded files get folded stacks, .json files a
+        chrome trace, and anything else the summary
+        """
+        if fmt is None:
+            fmt = "folded" if path.endswith(".folded") else "chrome" if path.endswith(".json") else "summary"
+        with open(path, "w") as file:
+            if fmt == "folded":
+                file.write(self.folded())
+            elif fmt == "chrome":
+                json.dump(self.chrome_trace(), file)
+            elif fmt == "summary":
+                json.dump(self.summary(), file, indent=2)
+            else:
+                raise Exception("Unknown trace format: " + str(fmt))
+
+    def reset(self):
+        self.__init__(self.keep_events)
@@ -0,0 +1,84 @@
+"""
+Checks of the sorted per-attribute indexes and the running averages behind department rankings.
+"""
+import math
+
+import pytest
+
+from src.library.ranking import RankIndex, DepartmentRanking
+
+
+def _index(scores):
+    index = RankIndex("tyrant")
+    for professor, score in scores.items():
+        index.update(professor, score)
+    return index
+
+
+def test_top_orders_by_score_and_moves_updated_professors():
+    index = _index({"a": 0.2, "b": 0.9, "c": 0.5})
+    assert index.top(2) == [("b", 0.9), ("c", 0.5)]
+    assert index.top(2, lowest=True) == [("a", 0.2), ("c", 0.5)]
+
+    index.update("a", 1.0)
+    assert len(index) == 3
+    assert index.top(1) == [("a", 1.0)]
+    index.remove("b")
+    assert "b" not in index
+    assert index.top(5) == [("a", 1.0), ("c", 0.5)]
+
+
+def test_top_zero_is_empty():
+    index = _index({"a": 0.2, "b": 0.9})
+    assert index.top(0) == []
+    assert index.top(0, lowest=True) == []
+
+
+def test_percentile_counts_strictly_beaten_professors():
+    index = _index({"a": 0.2, "b": 0.5, "c": 0.5, "d": 0.9})
+    assert index.percentile("d") == pytest.approx(100.0)
+    assert index.percentile("a") == pytest.approx(0.0)
+    # tied professors beat the same professors, and not each other
+    assert index.percentile("b") == index.percentile("c") == pytest.approx(100.0 / 3)
+
+    assert index.percentile("a", lowest=True) == pytest.approx(100.0)
+    assert index.percentile("d", lowest=True) == pytest.approx(0.0)
+    assert index.percentile("b", lowest=True) == index.percentile("c", lowest=True) == pytest.approx(100.0 / 3)
+
+
+def test_percentile_of_lone_or_unknown_professor():
+    index = _index({"a": 0.5})
+    assert index.percentile("a") == 0.0
+    assert index.percentile("a", lowest=True) == 0.0
+    with pytest.raises(KeyError):
+        index.percentile("b")
+    with pytest.raises(KeyError):
+        RankIndex().percentile("a")
+
+
+def test_department_ranking_averages_and_skips_missing_scores():
+    ranking = DepartmentRanking(["tyrant", "researcher"])
+    ranking.add_scores("a", {"tyrant": 0.2, "researcher": 0.8})
+    ranking.add_scores("a", {"tyrant": 0.4, "researcher": None})
+    ranking.add_scores("a", {"tyrant": math.nan, "communicator": 0.3})
+    ranking.add_scores("b", {"tyrant": None})
+
+    assert ranking.ratings("a") == 3
+    assert ranking.ratings("b") == 1
+    assert ranking.top("tyrant") == [("a", pytest.approx(0.3))]
+    assert ranking.top("researcher") == [("a", pytest.approx(0.8))]
+    # a professor whose scores never fired is not ranked at all
+    assert "b" not in ranking.indexes["tyrant"]
+    assert "communicator" not in ranking.indexes
+
+
+def test_department_ranking_add_rating_scores_the_rating():
+    from src.library.rule_engine import raw_attributes
+
+    ranking = DepartmentRanking()
+    scores = ranking.add_rating("a", {key: 0.5 for key in raw_attributes})
+    for attribute, index in ranking.indexes.items():
+        if scores[attribute] is None:
+            assert "a" not in index
+        else:
+            assert index.score("a") == pytest.approx(scores[attribute])
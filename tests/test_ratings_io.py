@@ -0,0 +1,54 @@
+"""
+Checks of the bulk ratings export and import: scoring matches evaluate, and every format round trips.
+"""
+import random
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from src.library.database import COLUMNS, connect_sqlite, insert_rating  # noqa: E402
+from src.library.ratings_io import RAW_COLUMNS, export_ratings, import_ratings, score_frame  # noqa: E402
+from src.library.rule_engine import evaluate, raw_attributes  # noqa: E402
+
+
+def _ratings(count, seed=0):
+    generator = random.Random(seed)
+    return [{key: generator.randint(1, 10) / 10.0 for key in raw_attributes} for _ in range(count)]
+
+
+def test_score_frame_matches_evaluate():
+    ratings = _ratings(20)
+    frame = score_frame(pd.DataFrame(ratings))
+    for i, rating in enumerate(ratings):
+        for key, levels in evaluate(rating).items():
+            for level, membership in levels.items():
+                assert frame[key + "." + level][i] == pytest.approx(membership)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "feather"])
+def test_export_import_round_trip(tmp_path, fmt):
+    if fmt != "csv":
+        pytest.importorskip("pyarrow")
+    ratings = _ratings(7)
+    source = connect_sqlite()
+    for i, rating in enumerate(ratings):
+        # the first chunk has no names at all, which must not change the column types of later chunks
+        insert_rating(source, None if i < 3 else "first", None if i < 3 else "last", rating)
+
+    written, path = export_ratings(source, str(tmp_path / ("ratings." + fmt)), chunksize=3)
+    assert written == len(ratings)
+    assert path.endswith("." + fmt)
+
+    target = connect_sqlite()
+    assert import_ratings(target, path, chunksize=3) == len(ratings)
+    rows = target.execute("SELECT firstname, {} FROM professors ORDER BY ID".format(
+        ", ".join(COLUMNS[key] for key in RAW_COLUMNS))).fetchall()
+    for i, (rating, row) in enumerate(zip(ratings, rows)):
+        assert row[0] == (None if i < 3 else "first")
+        assert list(row[1:]) == pytest.approx([rating[key] for key in RAW_COLUMNS])
+
+
+def test_export_unknown_column_is_refused(tmp_path):
+    with pytest.raises(Exception, match="Unknown export columns"):
+        export_ratings(connect_sqlite(), str(tmp_path / "ratings.csv"), columns=["tyrant.sometimes"])
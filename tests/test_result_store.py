@@ -0,0 +1,65 @@
+"""
+Checks of the memory-mapped result store: round trips through disk, and refusal of stores written for other rules.
+"""
+import json
+import random
+
+import numpy as np
+import pytest
+
+from src.library.result_store import FIELDS, ResultStore, score_into
+from src.library.rule_engine import evaluate, evaluate_batch, raw_attributes
+
+
+def _columns(count, seed=0):
+    generator = random.Random(seed)
+    return {key: np.array([generator.randint(1, 10) / 10.0 for _ in range(count)]) for key in raw_attributes}
+
+
+def test_create_write_and_reopen(tmp_path):
+    path = str(tmp_path / "results.npy")
+    columns = _columns(10)
+    store = ResultStore.create(path, 10)
+    assert store.write(0, evaluate_batch(columns)) == 10
+    store.flush()
+
+    reopened = ResultStore(path)
+    assert len(reopened) == 10
+    assert reopened.dtype == np.float64
+    for i in range(10):
+        expected = evaluate({key: float(column[i]) for key, column in columns.items()})
+        row = reopened.row(i)
+        for key, levels in expected.items():
+            assert row[key] == pytest.approx(levels)
+    key, level = FIELDS[0]
+    assert reopened[key, level].tolist() == reopened.get(key, level).tolist() == reopened[key][level].tolist()
+
+
+def test_score_into_in_batches_as_float32(tmp_path):
+    path = str(tmp_path / "results.npy")
+    columns = _columns(25)
+    store = score_into(path, columns, batch_size=7, dtype=np.float32)
+    assert store.dtype == np.float32
+    assert len(store) == 25
+    expected = evaluate_batch(columns)
+    for key, level in FIELDS:
+        np.testing.assert_allclose(store.get(key, level), expected[key][level], rtol=1e-6, atol=1e-7)
+
+
+def test_refuses_store_with_other_field_labels(tmp_path):
+    path = str(tmp_path / "results.npy")
+    ResultStore.create(path, 3).flush()
+    with open(path + ".fields.json") as file:
+        fields = json.load(file)["fields"]
+    fields[0], fields[1] = fields[1], fields[0]
+    with open(path + ".fields.json", "w") as file:
+        json.dump({"fields": fields}, file)
+    with pytest.raises(Exception, match="different derived attribute rules"):
+        ResultStore(path)
+
+
+def test_refuses_store_without_field_labels(tmp_path):
+    path = str(tmp_path / "results.npy")
+    np.save(path, np.zeros((len(FIELDS), 3)))
+    with pytest.raises(Exception, match="missing its field list"):
+        ResultStore(path)
@@ -0,0 +1,97 @@
+"""
+Equivalence checks between the scalar, batched and traced paths through the rule engine. Run from the repository root
+with: python -m pytest
+"""
+import math
+import random
+
+import numpy as np
+import pytest
+
+import src.library.demorgans_tripple as de
+from src.library.rule_engine import OP, evaluate, evaluate_batch, defuzzify, defuzzify_batch, resolve, \
+    generate_generic_attribute, raw_attributes, derived_attributes
+from src.library.tracing import Tracer
+
+TRIPLES = list(de.ARRAY_TRIPLES.keys())
+
+
+def _ratings(count=200, seed=0):
+    generator = random.Random(seed)
+    ratings = [{key: generator.randint(1, 10) / 10.0 for key in raw_attributes} for _ in range(count)]
+    # the extremes, where the absorbing elements of every triple come into play
+    ratings.append({key: 0.0 for key in raw_attributes})
+    ratings.append({key: 1.0 for key in raw_attributes})
+    return ratings
+
+
+def _columns(ratings):
+    return {key: [rating[key] for rating in ratings] for key in raw_attributes}
+
+
+def _resolve_every_branch(rules, sets, triple):
+    # resolve as it was before short-circuiting, evaluating every branch of every AND/OR
+    if rules[0] == OP.THEN:
+        return _resolve_every_branch(rules[2], sets, triple)
+    if rules[0] == OP.NOT:
+        return triple.neg(_resolve_every_branch(rules[1], sets, triple))
+    if rules[0] in (OP.AND, OP.OR):
+        resolutions = [_resolve_every_branch(rule, sets, triple) for rule in rules[1:]]
+        value = resolutions[0]
+        for r in resolutions[1:]:
+            value = triple.t(value, r) if rules[0] == OP.AND else triple.s(value, r)
+        return value
+    return sets[rules[0]][rules[1]]
+
+
+@pytest.mark.parametrize("triple", TRIPLES, ids=lambda triple: triple.__name__)
+def test_resolve_short_circuit_matches_every_branch(triple):
+    for rating in _ratings():
+        sets = {key: generate_generic_attribute(name=key, member_sets=spread).get_membership(rating[key])
+                for key, spread in raw_attributes.items()}
+        for _, rules in derived_attributes.values():
+            for rule in rules:
+                assert resolve(rule, sets, triple) == pytest.approx(_resolve_every_branch(rule, sets, triple))
+
+
+@pytest.mark.parametrize("triple", TRIPLES, ids=lambda triple: triple.__name__)
+def test_evaluate_batch_and_traced_evaluate_match_evaluate(triple):
+    ratings = _ratings()
+    batch = evaluate_batch(_columns(ratings), triple)
+    tracer = Tracer()
+    for i, rating in enumerate(ratings):
+        expected = evaluate(rating, triple)
+        assert evaluate(rating, triple, tracer=tracer) == expected
+        for key, levels in expected.items():
+            for level, value in levels.items():
+                assert batch[key][level][i] == pytest.approx(value)
+
+
+def test_defuzzify_batch_matches_defuzzify():
+    ratings = _ratings()
+    batch = defuzzify_batch(evaluate_batch(_columns(ratings)))
+    for i, rating in enumerate(ratings):
+        for key, value in defuzzify(evaluate(rating)).items():
+            if value is None:
+                assert math.isnan(batch[key][i])
+            else:
+                assert batch[key][i] == pytest.approx(value)
+
+
+def test_defuzzify_unfired_attribute_has_no_value():
+    levels = {rule[1]: 0.0 for rule in derived_attributes["tyrant"][1]}
+    assert defuzzify({"tyrant": levels})["tyrant"] is None
+
+
+def test_defuzzify_symmetric_trapezoid_is_its_midpoint():
+    levels = {"high": 1.0, "medium": 0.0, "low": 0.0}
+    assert defuzzify({"researcher": levels})["researcher"] == pytest.approx(1.0)
+
+
+def test_array_triples_match_scalar_triples():
+    values = np.linspace(0, 1, 11)
+    for triple, array_triple in de.ARRAY_TRIPLES.items():
+        for a in values:
+            for b in values:
+                assert array_triple.t(np.array([a]), np.array([b]))[0] == pytest.approx(triple.t(a, b))
+                assert array_triple.s(np.array([a]), np.array([b]))[0] == pytest.approx(triple.s(a, b))
@@ -0,0 +1,92 @@
+"""
+Checks of the scoring service: responses match evaluate, micro-batches isolate failures, and a service outlives the
+event loop it was first used on.
+"""
+import asyncio
+import random
+
+import pytest
+
+import src.library.service as service_module
+from src.library.rule_engine import evaluate, raw_attributes
+from src.library.service import LocalClient, ScoringService
+
+
+def _ratings(count, seed=0):
+    generator = random.Random(seed)
+    return [{key: generator.randint(1, 10) / 10.0 for key in raw_attributes} for _ in range(count)]
+
+
+def _assert_matches_evaluate(ratings, responses):
+    for rating, (status, body) in zip(ratings, responses):
+        assert status == 200
+        for key, levels in evaluate(rating).items():
+            assert body[key] == pytest.approx(levels)
+
+
+def test_service_matches_evaluate_and_rejects_invalid_ratings():
+    ratings = _ratings(5)
+
+    async def scenario():
+        service = ScoringService(max_delay=0.01)
+        client = LocalClient(service)
+        bad = {**ratings[0], "empathy": 10 ** 400}
+        responses = await asyncio.gather(*[client.evaluate(rating) for rating in ratings], client.evaluate(bad),
+                                         client.evaluate({**ratings[0], "empathy": "high"}))
+        batch = await client.evaluate_batch(ratings)
+        await service.close()
+        return responses, batch
+
+    responses, (status, batch) = asyncio.run(scenario())
+    _assert_matches_evaluate(ratings, responses)
+    assert responses[-2][0] == 400
+    assert responses[-1][0] == 400
+    assert status == 200
+    _assert_matches_evaluate(ratings, [(200, body) for body in batch])
+
+
+def test_failing_rating_does_not_fail_its_micro_batch(monkeypatch):
+    ratings = _ratings(5)
+    marked = {**ratings[0], "empathy": 0.55}
+    score_batch = service_module.score_batch
+
+    def failing_score_batch(batch, triple):
+        if any(rating["empathy"] == 0.55 for rating in batch):
+            raise ValueError("cannot score the marked rating")
+        return score_batch(batch, triple)
+
+    monkeypatch.setattr(service_module, "score_batch", failing_score_batch)
+
+    async def scenario():
+        service = ScoringService(max_delay=0.05)
+        client = LocalClient(service)
+        responses = await asyncio.gather(*[client.evaluate(rating) for rating in ratings[:3]], client.evaluate(marked),
+                                         *[client.evaluate(rating) for rating in ratings[3:]])
+        batches = service.batcher.batches
+        await service.close()
+        return responses, batches
+
+    responses, batches = asyncio.run(scenario())
+    # everything went out in one batch, so the marked rating really did fail the whole batch call
+    assert batches == 1
+    _assert_matches_evaluate(ratings, responses[:3] + responses[4:])
+    assert responses[3][0] == 500
+    assert "marked rating" in responses[3][1]["error"]
+
+
+def test_service_can_be_used_from_several_event_loops():
+    ratings = _ratings(3)
+    service = ScoringService(max_delay=0.001)
+    client = LocalClient(service)
+
+    async def scenario():
+        return await asyncio.wait_for(asyncio.gather(*[client.evaluate(rating) for rating in ratings]), 5)
+
+    # the first loop is left without closing the service, as a caller that forgot to would
+    _assert_matches_evaluate(ratings, asyncio.run(scenario()))
+    _assert_matches_evaluate(ratings, asyncio.run(scenario()))
+
+    async def close():
+        await service.close()
+
+    asyncio.run(close())
@@ -0,0 +1,56 @@
+"""
+Checks of the response-surface sweeps against single evaluations, and of the sensitivity estimate.
+"""
+import numpy as np
+import pytest
+
+from src.library.rule_engine import evaluate, defuzzify
+from src.library.sweep import baseline, first_order_index, monte_carlo, sweep_1d, sweep_2d
+
+
+def test_sweep_1d_matches_evaluate():
+    result = sweep_1d("empathy", 11)
+    assert result.shape == (11,)
+    for i, value in enumerate(result.inputs["empathy"]):
+        rating = {**baseline(), "empathy": float(value)}
+        for key, levels in evaluate(rating).items():
+            for level, membership in levels.items():
+                assert result.memberships[key][level][i] == pytest.approx(membership)
+        for key, score in defuzzify(evaluate(rating)).items():
+            if score is None:
+                assert np.isnan(result.scores[key][i])
+            else:
+                assert result.scores[key][i] == pytest.approx(score)
+
+
+def test_sweep_2d_grid_and_fixed_inputs():
+    result = sweep_2d(("empathy", "workload"), points=(3, 4), fixed={"knowledge": 0.9})
+    assert result.shape == (3, 4)
+    rating = {**baseline(), "knowledge": 0.9, "empathy": float(result.inputs["empathy"][2, 1]),
+              "workload": float(result.inputs["workload"][2, 1])}
+    for key, levels in evaluate(rating).items():
+        for level, membership in levels.items():
+            assert result.memberships[key][level][2, 1] == pytest.approx(membership)
+
+
+def test_sweep_rejects_unknown_attribute():
+    with pytest.raises(Exception, match="Unknown raw attribute"):
+        sweep_1d("charisma")
+
+
+def test_first_order_index():
+    x = np.linspace(0, 1, 1000)
+    assert first_order_index(x, 2 * x) == pytest.approx(1.0, abs=0.01)
+    assert first_order_index(x, np.ones_like(x)) == 0.0
+    # points where no rule fired are left out rather than poisoning the estimate
+    y = 2 * x
+    y[::10] = np.nan
+    assert first_order_index(x, y) == pytest.approx(1.0, abs=0.01)
+    assert first_order_index(x, np.full_like(x, np.nan)) == 0.0
+
+
+def test_monte_carlo_sensitivity_is_bounded():
+    result = monte_carlo(["empathy", "workload"], samples=2000, seed=1)
+    for indexes in result.sensitivity().values():
+        for index in indexes.values():
+            assert 0.0 <= index <= 1.0 + 1e-9
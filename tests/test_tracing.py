@@ -0,0 +1,83 @@
+"""
+Checks of the tracer's own output: node visit and short-circuit counters, and every export format.
+"""
+import json
+
+import pytest
+
+from src.library.rule_engine import OP, evaluate, raw_attributes, derived_attributes
+from src.library.tracing import Tracer
+
+_SETS = {"a": {"low": 0.0, "high": 1.0}, "b": {"low": 0.4, "high": 0.6}, "c": {"low": 0.7, "high": 0.3}}
+
+
+def test_counts_visits_and_short_circuited_branches():
+    tracer = Tracer()
+    rule = (OP.THEN, "high", (OP.AND, ("a", "low"), ("b", "high"), ("c", "high")))
+    assert tracer.trace_rule("x", rule, _SETS) == 0.0
+    nodes = tracer.summary()["nodes"]
+    assert nodes == {"x/high": {"node": "THEN high", "visits": 1, "skipped": 0},
+                     "x/high/0": {"node": "AND", "visits": 1, "skipped": 2},
+                     "x/high/0/0": {"node": "a is low", "visits": 1, "skipped": 0}}
+
+    rule = (OP.THEN, "low", (OP.OR, ("b", "low"), (OP.NOT, ("c", "high")), ("a", "high")))
+    assert tracer.trace_rule("x", rule, _SETS) == pytest.approx(1.0)
+    tracer.trace_rule("x", rule, _SETS)
+    nodes = tracer.summary()["nodes"]
+    # the OR only reaches its absorbing 1 at the last branch, so nothing is skipped
+    assert nodes["x/low/0"] == {"node": "OR", "visits": 2, "skipped": 0}
+    assert nodes["x/low/0/1"] == {"node": "NOT", "visits": 2, "skipped": 0}
+    assert nodes["x/low/0/1/0"] == {"node": "c is high", "visits": 2, "skipped": 0}
+    assert nodes["x/low/0/2"]["visits"] == 2
+
+    rules = tracer.summary()["rules"]
+    assert rules["x/high"]["calls"] == 1
+    assert rules["x/high"]["fired"] == 0
+    assert rules["x/low"]["calls"] == 2
+    assert rules["x/low"]["fired"] == 2
+    assert rules["x/low"]["mean_strength"] == pytest.approx(1.0)
+
+
+def _traced(keep_events=True):
+    tracer = Tracer(keep_events)
+    for value in (0.2, 0.8):
+        evaluate({key: value for key in raw_attributes}, tracer=tracer)
+    return tracer
+
+
+def test_export_formats(tmp_path):
+    tracer = _traced()
+    rule_count = sum(len(rules) for _, rules in derived_attributes.values())
+
+    tracer.export(str(tmp_path / "trace.folded"))
+    lines = (tmp_path / "trace.folded").read_text().splitlines()
+    assert len(lines) == rule_count
+    for line in lines:
+        stack, microseconds = line.rsplit(" ", 1)
+        assert stack.startswith("evaluate;") and stack.count(";") == 2
+        assert int(microseconds) >= 0
+
+    tracer.export(str(tmp_path / "trace.json"))
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert len(events) == 2 * rule_count
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+
+    tracer.export(str(tmp_path / "summary.txt"))
+    summary = json.loads((tmp_path / "summary.txt").read_text())
+    assert len(summary["rules"]) == rule_count
+    assert all(rule["calls"] == 2 for rule in summary["rules"].values())
+
+    tracer.export(str(tmp_path / "trace.out"), fmt="folded")
+    assert (tmp_path / "trace.out").read_text().count("\n") == rule_count
+    with pytest.raises(Exception, match="Unknown trace format"):
+        tracer.export(str(tmp_path / "trace.svg"), fmt="svg")
+
+
+def test_counters_only_and_reset():
+    tracer = _traced(keep_events=False)
+    assert tracer.events == []
+    assert tracer.chrome_trace() == {"traceEvents": []}
+    assert tracer.summary()["rules"]
+    tracer.reset()
+    assert tracer.summary() == {"rules": {}, "nodes": {}}
+    assert not tracer.keep_events